@@ -1,5 +1,7 @@
 from pathlib import Path
 
+_PLUGIN_DIR = Path(__file__).parent
+
 
 def get_plugin_dir() -> Path:
     """
@@ -10,4 +12,4 @@ def get_plugin_dir() -> Path:
 
         :return: Path object of plugin directory
     """
-    return Path(__file__).parent
+    return _PLUGIN_DIR
@@ -1,11 +1,17 @@
 import copyreg
 import json
 import logging
+import os
 import pprint
+import random
 import re
+import ssl
 import sys
+import threading
+from collections import OrderedDict
 from functools import lru_cache
-from time import sleep
+from pathlib import Path
+from time import monotonic, sleep, time
 from typing import BinaryIO
 
 from markdown import Markdown
@@ -30,7 +36,6 @@ from errbot.backends.base import (
 )
 from errbot.core import ErrBot
 from errbot.rendering.ansiext import IMTEXT_CHRS, AnsiExtension, enable_format
-from errbot.utils import split_string_after
 
 log = logging.getLogger(__name__)
 
@@ -38,6 +43,7 @@ log = logging.getLogger(__name__)
 try:
     from slack_bolt import App
     from slack_bolt.adapter.socket_mode import SocketModeHandler
+    from slack_sdk.errors import SlackApiError
     from slack_sdk.web import WebClient
 except ImportError:
     log.exception("Could not start the SlackBolt backend")
@@ -55,6 +61,74 @@ SLACK_CLIENT_CHANNEL_HYPERLINK = re.compile(r"^<#(?P<id>([CG])[0-9A-Z]+)>$")
 # Empirically determined message size limit.
 SLACK_MESSAGE_LIMIT = 4096
 
+# How long (in seconds) the users directory fetched from Slack is trusted.
+USERS_CACHE_TTL = 600
+
+# A user name missing from a directory older than this (in seconds) triggers
+# a new fetch, to find users who joined the workspace since.
+USERS_CACHE_MISS_REFRESH_AGE = 60
+
+# File of BOT_DATA_DIR keeping the users directory across restarts, and how
+# old (in seconds) it may be to still be used while a fresh copy is fetched.
+USERS_SNAPSHOT_FILENAME = "slackbolt_users.json"
+USERS_SNAPSHOT_MAX_AGE = 24 * 60 * 60
+
+# How many users.info results are kept (for USERS_CACHE_TTL seconds).
+USERS_INFO_CACHE_SIZE = 10000
+
+# How many email addresses unknown to Slack are remembered (for
+# USERS_CACHE_MISS_REFRESH_AGE seconds), so repeated misses don't call the API.
+MISSING_EMAILS_CACHE_SIZE = 1000
+
+# How long (in seconds) and how many conversations.info results are kept.
+CONVERSATIONS_CACHE_TTL = 600
+CONVERSATIONS_CACHE_SIZE = 1000
+
+# How long (in seconds) a room keeps the channel info it fetched.
+ROOM_INFO_CACHE_TTL = 30
+
+# How long (in seconds) and how many IDs resolved from identifier texts are kept.
+IDENTIFIERS_CACHE_TTL = 300
+IDENTIFIERS_CACHE_SIZE = 4096
+
+# How long (in seconds) and how many direct message channel IDs are kept.
+IM_CHANNELS_CACHE_TTL = 3600
+IM_CHANNELS_CACHE_SIZE = 1024
+
+# Page size requested from users.list. Slack caps it at 1000 and applies
+# stricter rate limits to paginated calls made without an explicit limit.
+# See https://api.slack.com/docs/pagination
+USERS_PAGE_LIMIT = 1000
+
+# Page size requested from conversations.list, the most Slack recommends.
+# As for users.list, an explicit limit avoids the stricter rate limits.
+CONVERSATIONS_PAGE_LIMIT = 200
+
+# Safety nets for cursor pagination: Slack has been seen returning empty pages
+# along with a non-empty next_cursor, which would otherwise loop for minutes.
+PAGINATION_MAX_EMPTY_PAGES = 3
+PAGINATION_MAX_PAGES = 500
+
+# How many times a rate limited (HTTP 429) page is requested again, and the
+# longest wait (in seconds) between two requests, unless Slack's Retry-After
+# is longer. Waits grow exponentially from Retry-After, with random jitter so
+# that bots sharing a token don't retry in lockstep.
+PAGINATION_RETRY_LIMIT = 8
+PAGINATION_RETRY_MAX_DELAY = 120
+
+# Longest total wait (in seconds) on rate limits while fetching the users
+# directory, enough for one of the longest waits above. Lookups wait for the
+# fetch meanwhile, longer rate limits are left to a later refresh.
+USERS_REFRESH_MAX_WAIT = PAGINATION_RETRY_MAX_DELAY
+
+# Longest total wait (in seconds) on rate limits while looking a channel up by
+# name. The lookup is done for a command, better fail than make it hang.
+CONVERSATIONS_LOOKUP_MAX_WAIT = 30
+
+# How long (in seconds) no fetch of the users directory is tried after one
+# failed, unless Slack asks to wait longer.
+USERS_REFRESH_FAILURE_DELAY = 60
+
 USER_IS_BOT_HELPTEXT = (
     "Connected to Slack using a bot account, which cannot manage "
     "channels itself (you must invite the bot to channels instead, "
@@ -79,10 +153,51 @@ MARKDOWN_LINK_REGEX = re.compile(
     r"(?<!!)\[(?P<text>[^\]]+?)\]\((?P<uri>[a-zA-Z0-9]+?:\S+?)\)"
 )
 
+# User mentions of incoming texts, e.g. <@U12345> or <@U12345|user>.
+MENTION_REGEX = re.compile(r"<@[UWB][0-9A-Z]+(?:\|[^>]*)?>")
+
+# Links of incoming texts, e.g. <http://example.org|example.org> or
+# <mailto:example@example.org|example@example.org>, and <http://example.org>.
+LABELLED_URI_REGEX = re.compile(r"<([^|>]+)\|([^|>]+)>")
+BARE_URI_REGEX = re.compile(r"<(http([^>]+))>")
+
+# Slack markup of incoming texts, matched in a single pass: user mentions
+# (see process_mentions) and labelled or bare links (see sanitize_uris).
+MESSAGE_MARKUP_REGEX = re.compile(
+    rf"(?P<mention>{MENTION_REGEX.pattern})"
+    r"|<[^|>]+\|(?P<label>[^|>]+)>|<(?P<uri>http[^>]+)>"
+)
+
+# Bolt listener pattern receiving every message event.
+ANY_MESSAGE_REGEX = re.compile(r".*")
+
+# Channel ID prefixes of messages handled by the backend
+# (public channels, private groups and direct messages).
+MESSAGE_CHANNEL_PREFIXES = frozenset("CGD")
+IGNORED_MESSAGE_SUBTYPES = frozenset(
+    {"message_deleted", "channel_topic", "message_replied"}
+)
+
+# How many chunked message bodies are kept, and the longest body (in
+# characters) kept.
+PREPARED_BODIES_CACHE_SIZE = 512
+PREPARED_BODY_CACHE_MAX_LENGTH = 64 * 1024
 
+# Bytes which may be added to a chunked message body, to reopen and close a
+# code block split across chunks.
+CODE_FENCES_LENGTH = len("```\n") + len("\n```\n")
+
+# Arguments of chat.postMessage shared by every part of a sent message.
+POST_MESSAGE_DEFAULTS = {"unfurl_media": "true", "link_names": "1", "as_user": "true"}
+
+
+@lru_cache(maxsize=2)
 def slack_markdown_converter(compact_output=False):
     """
     This is a Markdown converter for use with Slack.
+
+    Converters are built once per ``compact_output`` value and shared.
+    Call ``reset()`` on them before converting a new text.
     """
     enable_format("imtext", IMTEXT_CHRS, borders=not compact_output)
     md = Markdown(
@@ -93,6 +208,75 @@ def slack_markdown_converter(compact_output=False):
     return md
 
 
+def split_message_body(body, size_limit):
+    """
+    Split ``body`` into chunks of at most ``size_limit`` bytes once UTF-8 encoded.
+
+    Chunks end after the last newline (or else space) that fits, and never in
+    the middle of a multi-byte character. An empty body is a single empty chunk,
+    and chunks holding only whitespace or code fences are left out.
+    """
+    # Most bodies fit in one chunk, and ASCII ones need no encoding to tell.
+    if len(body) <= size_limit and body.isascii():
+        yield body
+        return
+    encoded = body.encode("utf-8")
+    start, length = 0, len(encoded)
+    while length - start > size_limit:
+        end = start + size_limit
+        while encoded[end] & 0xC0 == 0x80:  # UTF-8 continuation byte
+            end -= 1
+        for separator in (b"\n", b" "):
+            cut = encoded.rfind(separator, start, end) + 1
+            # Don't break where the chunk would be left with nothing to show.
+            if cut > start and not _is_blank_chunk(encoded[start:cut]):
+                end = cut
+                break
+        if not _is_blank_chunk(encoded[start:end]):
+            yield encoded[start:end].decode("utf-8")
+        start = end
+    if start == 0 or not _is_blank_chunk(encoded[start:]):
+        yield encoded[start:].decode("utf-8")
+
+
+def _is_blank_chunk(chunk):
+    """Tell whether a chunk of an encoded message body would show nothing"""
+    return not chunk.replace(b"```", b"").strip()
+
+
+def _prepare_message_body(body, size_limit):
+    """Chunk a message body, see :meth:`SlackBoltBackend.prepare_message_body`"""
+    fixed_format = body.startswith("```")  # hack to fix the formatting
+    parts = list(split_message_body(body, size_limit))
+    if "```" in body and (len(parts) > 1 or body.count("```") % 2 != 0):
+        # Leave room for the fences added below.
+        parts = list(split_message_body(body, size_limit - CODE_FENCES_LENGTH))
+
+    if len(parts) == 1:
+        # If we've got an open fixed block, close it out
+        if parts[0].count("```") % 2 != 0:
+            parts[0] += "\n```\n"
+    else:
+        for i, part in enumerate(parts):
+            starts_with_code = part.startswith("```")
+
+            # If we're continuing a fixed block from the last part
+            if fixed_format and not starts_with_code:
+                parts[i] = "```\n" + part
+
+            # If we've got an open fixed block, close it out
+            if parts[i].count("```") % 2 != 0:
+                parts[i] += "\n```\n"
+
+    return tuple(parts)
+
+
+# Bots often send the same texts again (help, status lines and so on).
+_cached_prepare_message_body = lru_cache(maxsize=PREPARED_BODIES_CACHE_SIZE)(
+    _prepare_message_body
+)
+
+
 class LinkPreProcessor(Preprocessor):
     """
     This preprocessor converts markdown URL notation into Slack URL notation
@@ -100,9 +284,59 @@ class LinkPreProcessor(Preprocessor):
     """
 
     def run(self, lines):
-        for i, line in enumerate(lines):
-            lines[i] = MARKDOWN_LINK_REGEX.sub(r"&lt;\2|\1&gt;", line)
-        return lines
+        # A single pass over the whole text is much cheaper than one per line.
+        text = MARKDOWN_LINK_REGEX.sub(r"&lt;\2|\1&gt;", "\n".join(lines))
+        return text.split("\n")
+
+
+class _ExpiringCache:
+    """
+    A bounded mapping whose entries expire ``ttl`` seconds after being stored.
+
+    When ``maxsize`` entries are stored, the least recently used one is evicted.
+    """
+
+    def __init__(self, ttl, maxsize):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expires_at, value = self._data[key]
+            except KeyError:
+                return default
+            if expires_at <= monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._data[key] = (monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def discard_matching(self, predicate):
+        """Remove the entries whose value ``predicate`` returns True for"""
+        with self._lock:
+            keys = [key for key, (_, value) in self._data.items() if predicate(value)]
+            for key in keys:
+                del self._data[key]
+
+    def clear(self):
+        # Swap in an empty mapping, the old entries are freed once the lock
+        # is released (when ``data`` goes out of scope).
+        with self._lock:
+            data, self._data = self._data, OrderedDict()
 
 
 class SlackAPIResponseError(RuntimeError):
@@ -117,12 +351,18 @@ class SlackAPIResponseError(RuntimeError):
         super().__init__(*args, **kwargs)
 
 
+class SlackPaginationError(RuntimeError):
+    """Slack API cursor pagination was stopped before its last page"""
+
+
 class SlackPerson(Person):
     """
     This class describes a person on Slack's network.
     """
 
-    def __init__(self, webclient: WebClient, userid=None, channelid=None):
+    def __init__(
+        self, webclient: WebClient, userid=None, channelid=None, bot=None, user=None
+    ):
         if userid is not None and userid[0] not in ("U", "B", "W"):
             raise Exception(
                 f"This is not a Slack user or bot id: {userid} (should start with U, B or W)"
@@ -136,6 +376,8 @@ class SlackPerson(Person):
         self._userid = userid
         self._channelid = channelid
         self._webclient = webclient
+        self._bot = bot
+        self._user = user  # users.info data, fetched on first use if not given
         self._username = None  # cache
         self._fullname = None
         self._channelname = None
@@ -145,13 +387,22 @@ class SlackPerson(Person):
     def userid(self):
         return self._userid
 
+    def _fetch_user(self):
+        """Return the ``users.info`` data of this person, fetched only once"""
+        if self._user is None:
+            if self._bot is not None:
+                self._user = self._bot._user_info(self._userid)
+            else:
+                self._user = self._webclient.users_info(user=self._userid)["user"]
+        return self._user
+
     @property
     def username(self):
         """Convert a Slack user ID to their user name"""
         if self._username:
             return self._username
 
-        user = self._webclient.users_info(user=self._userid)["user"]
+        user = self._fetch_user()
         if user is None:
             log.error("Cannot find user with ID %s", self._userid)
             return f"<{self._userid}>"
@@ -173,11 +424,12 @@ class SlackPerson(Person):
         if self._channelname:
             return self._channelname
 
-        channel = [
-            channel
-            for channel in self._webclient.channels_list()
-            if channel["id"] == self._channelid
-        ][0]
+        if self._bot is not None:
+            channel = self._bot.channelid_to_channel(self._channelid)
+        else:
+            channel = self._webclient.conversations_info(channel=self._channelid)[
+                "channel"
+            ]
         if channel is None:
             raise RoomDoesNotExistError(f"No channel with ID {self._channelid} exists.")
         if not self._channelname:
@@ -205,7 +457,7 @@ class SlackPerson(Person):
         if self._fullname:
             return self._fullname
 
-        user = self._webclient.users_info(user=self._userid)["user"]
+        user = self._fetch_user()
         if user is None:
             log.error("Cannot find user with ID %s", self._userid)
             return f"<{self._userid}>"
@@ -218,13 +470,13 @@ class SlackPerson(Person):
     @property
     def email(self):
         """Convert a Slack user ID to their user email"""
-        user = self._webclient.users_info(user=self._userid)["user"]
+        user = self._fetch_user()
         if user is None:
             log.error("Cannot find user with ID %s", self._userid)
             return "<%s>" % self._userid
 
-        email = user["profile"]["email"]
-        return email
+        profile = user.get("profile") or {}
+        return profile.get("email")
 
     def __unicode__(self):
         return f"@{self.username}"
@@ -254,8 +506,8 @@ class SlackRoomOccupant(RoomOccupant, SlackPerson):
     """
 
     def __init__(self, webclient: WebClient, userid, channelid, bot):
-        super().__init__(webclient, userid, channelid)
-        self._room = SlackRoom(webclient=webclient, channelid=channelid, bot=bot)
+        super().__init__(webclient, userid, channelid, bot=bot)
+        self._room = bot.get_room(channelid)
 
     @property
     def room(self):
@@ -305,6 +557,10 @@ class SlackBot(SlackPerson):
     def fullname(self):
         return None
 
+    @property
+    def email(self):
+        return None
+
 
 class SlackRoomBot(RoomOccupant, SlackBot):
     """
@@ -313,7 +569,7 @@ class SlackRoomBot(RoomOccupant, SlackBot):
 
     def __init__(self, sc, bot_id, bot_username, channelid, bot):
         super().__init__(sc, bot_id, bot_username)
-        self._room = SlackRoom(webclient=sc, channelid=channelid, bot=bot)
+        self._room = bot.get_room(channelid)
 
     @property
     def room(self):
@@ -376,8 +632,32 @@ class SlackBoltBackend(ErrBot):
         self.bot_app = None
         self.webclient = None
         self.bot_identifier = None
+        self._bot_user = None
+        self._identifiers_cache = _ExpiringCache(
+            IDENTIFIERS_CACHE_TTL, IDENTIFIERS_CACHE_SIZE
+        )
+        self._users_cache_lock = threading.Lock()
+        self._users_refresh_thread = None
+        self._users_refresh_not_before = float("-inf")
+        self._users_info_cache = _ExpiringCache(USERS_CACHE_TTL, USERS_INFO_CACHE_SIZE)
+        self._missing_emails = _ExpiringCache(
+            USERS_CACHE_MISS_REFRESH_AGE, MISSING_EMAILS_CACHE_SIZE
+        )
+        self._team_id = None
+        self._forget_users()
+        self._conversations_cache = _ExpiringCache(
+            CONVERSATIONS_CACHE_TTL, CONVERSATIONS_CACHE_SIZE
+        )
+        self._channelids_by_name = _ExpiringCache(
+            CONVERSATIONS_CACHE_TTL, CONVERSATIONS_CACHE_SIZE
+        )
+        self._rooms = _ExpiringCache(CONVERSATIONS_CACHE_TTL, CONVERSATIONS_CACHE_SIZE)
+        self._im_channels_cache = _ExpiringCache(
+            IM_CHANNELS_CACHE_TTL, IM_CHANNELS_CACHE_SIZE
+        )
         compact = config.COMPACT_OUTPUT if hasattr(config, "COMPACT_OUTPUT") else False
         self.md = slack_markdown_converter(compact)
+        self._md_lock = threading.Lock()
         self._register_identifiers_pickling()
 
     def update_alternate_prefixes(self):
@@ -388,37 +668,67 @@ class SlackBoltBackend(ErrBot):
         """
         # convert BOT_ALT_PREFIXES to a list
         try:
-            bot_prefixes = self.bot_config.BOT_ALT_PREFIXES.split(",")
+            bot_prefixes = [
+                prefix.strip() for prefix in self.bot_config.BOT_ALT_PREFIXES.split(",")
+            ]
         except AttributeError:
             bot_prefixes = list(self.bot_config.BOT_ALT_PREFIXES)
 
+        userids = self.usernames_to_userids(bot_prefixes)
         converted_prefixes = []
         for prefix in bot_prefixes:
-            try:
-                converted_prefixes.append(f"<@{self.username_to_userid(prefix)}>")
-            except Exception as e:
+            if prefix in userids:
+                converted_prefixes.append(f"<@{userids[prefix]}>")
+            else:
                 log.error(
-                    'Failed to look up Slack userid for alternate prefix "%s": %s',
-                    prefix,
-                    e,
+                    'Failed to look up Slack userid for alternate prefix "%s"', prefix
                 )
 
-        self.bot_alt_prefixes = tuple(
-            x.lower() for x in self.bot_config.BOT_ALT_PREFIXES
-        )
-        log.debug("Converted bot_alt_prefixes: %s", self.bot_config.BOT_ALT_PREFIXES)
+        # Keep the names too: mentions are turned back into @username before
+        # the message reaches the command matching.
+        prefixes = (*bot_prefixes, *converted_prefixes)
+        if self.bot_config.BOT_ALT_PREFIX_CASEINSENSITIVE:
+            prefixes = tuple(prefix.lower() for prefix in prefixes)
+        self.bot_alt_prefixes = prefixes
+        log.debug("Converted bot_alt_prefixes: %s", self.bot_alt_prefixes)
 
     def _setup_slack_callbacks(self):
-        @self.bot_app.message(re.compile(r".*"))
+        @self.bot_app.message(ANY_MESSAGE_REGEX)
         def serve_messages(event):
             log.debug(event)
             self._message_event_handler(self.bot_app.client, event)
 
+        @self.bot_app.event("team_join")
+        def serve_team_join(event):
+            self._user_change_event_handler(self.bot_app.client, event)
+
+        @self.bot_app.event("user_change")
+        def serve_user_change(event):
+            self._user_change_event_handler(self.bot_app.client, event)
+
+        @self.bot_app.event("channel_rename")
+        @self.bot_app.event("channel_deleted")
+        @self.bot_app.event("group_rename")
+        @self.bot_app.event("group_deleted")
+        def serve_channel_change(event):
+            self._channel_change_event_handler(self.bot_app.client, event)
+
     def serve_forever(self):
-        self.bot_app = App(token=self.bot_token)
+        # Share one TLS context between all Web API requests: building one
+        # loads the CA certificates again, for every request otherwise.
+        client = WebClient(token=self.bot_token, ssl=ssl.create_default_context())
+        self.bot_app = App(client=client)
 
         auth_test = self.bot_app.client.auth_test()
-        self.bot_identifier = SlackPerson(self.bot_app.client, auth_test["user_id"])
+        self._team_id = auth_test["team_id"]
+        self._load_users_snapshot()
+        # The bot's own user never changes, fetch it once for all its identifiers.
+        self._bot_user = self.bot_app.client.users_info(user=auth_test["user_id"])[
+            "user"
+        ]
+        self.bot_identifier = SlackPerson(
+            self.bot_app.client, auth_test["user_id"], bot=self, user=self._bot_user
+        )
         self._hello_event_handler(self.bot_app.client, None)
         self._setup_slack_callbacks()
 
@@ -448,7 +758,7 @@ class SlackBoltBackend(ErrBot):
     def _presence_change_event_handler(self, webclient: WebClient, event):
         """Event handler for the 'presence_change' event"""
 
-        idd = SlackPerson(webclient, event["user"])
+        idd = SlackPerson(webclient, event["user"], bot=self)
         presence = event["presence"]
         # According to https://api.slack.com/docs/presence, presence can
         # only be one of 'active' and 'away'
@@ -466,13 +776,14 @@ class SlackBoltBackend(ErrBot):
     def _message_event_handler(self, webclient: WebClient, event):
         """Event handler for the 'message' event"""
         channel = event["channel"]
-        if channel[0] not in "CGD":
+        channel_type = channel[:1]
+        if channel_type not in MESSAGE_CHANNEL_PREFIXES:
             log.warning("Unknown message type! Unable to handle %s", channel)
             return
 
-        subtype = event.get("subtype", None)
+        subtype = event.get("subtype")
 
-        if subtype in ("message_deleted", "channel_topic", "message_replied"):
+        if subtype in IGNORED_MESSAGE_SUBTYPES:
             log.debug("Message of type %s, ignoring this event", subtype)
             return
 
@@ -490,13 +801,10 @@ class SlackBoltBackend(ErrBot):
                 "by Slack auto-expanding a link"
             )
             return
-        text = event["text"]
-
-        text, mentioned = self.process_mentions(text)
-
-        text = self.sanitize_uris(text)
+        text, mentioned = self._process_markup(event["text"])
 
-        log.debug("Saw an event: %s", pprint.pformat(event))
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Saw an event: %s", pprint.pformat(event))
         log.debug("Escaped IDs event text: %s", text)
 
         msg = Message(
@@ -507,7 +815,7 @@ class SlackBoltBackend(ErrBot):
             },
         )
 
-        if channel.startswith("D"):
+        if channel_type == "D":
             if subtype == "bot_message":
                 msg.frm = SlackBot(
                     webclient,
@@ -515,27 +823,27 @@ class SlackBoltBackend(ErrBot):
                     bot_username=event.get("username", ""),
                 )
             else:
-                msg.frm = SlackPerson(webclient, event["user"], event["channel"])
+                msg.frm = SlackPerson(webclient, event["user"], channel, bot=self)
             msg.to = SlackPerson(
-                webclient, self.bot_identifier.userid, event["channel"]
+                webclient,
+                self.bot_identifier.userid,
+                channel,
+                bot=self,
+                user=self._bot_user,
             )
-            channel_link_name = event["channel"]
+            channel_link_name = channel
         else:
             if subtype == "bot_message":
                 msg.frm = SlackRoomBot(
                     webclient,
                     bot_id=event.get("bot_id"),
                     bot_username=event.get("username", ""),
-                    channelid=event["channel"],
+                    channelid=channel,
                     bot=self,
                 )
             else:
-                msg.frm = SlackRoomOccupant(
-                    webclient, event["user"], event["channel"], bot=self
-                )
-            msg.to = SlackRoom(
-                webclient=webclient, channelid=event["channel"], bot=self
-            )
+                msg.frm = SlackRoomOccupant(webclient, event["user"], channel, bot=self)
+            msg.to = self.get_room(channel)
             channel_link_name = msg.to.name
 
         # TODO: port to slackclient2
@@ -549,28 +857,53 @@ class SlackBoltBackend(ErrBot):
 
     def _member_joined_channel_event_handler(self, webclient: WebClient, event):
         """Event handler for the 'member_joined_channel' event"""
-        user = SlackPerson(webclient, event["user"])
+        user = SlackPerson(webclient, event["user"], bot=self)
         if user == self.bot_identifier:
-            self.callback_room_joined(
-                SlackRoom(webclient=webclient, channelid=event["channel"], bot=self)
-            )
+            self.callback_room_joined(self.get_room(event["channel"]))
+
+    def _user_change_event_handler(self, webclient: WebClient, event):
+        """Event handler for the 'team_join' and 'user_change' events"""
+        user = self._slim_user(event["user"])
+        log.debug("User %s changed, updating users cache", user["id"])
+        self._update_user(user)
+
+    def _channel_change_event_handler(self, webclient: WebClient, event):
+        """Event handler for the events renaming or deleting channels"""
+        log.debug("Received %s event, clearing conversations cache", event["type"])
+        self.clear_conversations_cache()
 
     def userid_to_username(self, id_: str):
         """Convert a Slack user ID to their user name"""
-        user = self.webclient.users_info(user=id_)["user"]
+        user = self._user_info(id_)
         if user is None:
             raise UserDoesNotExistError(f"Cannot find user with ID {id_}.")
         return user["name"]
 
+    def _user_info(self, id_: str):
+        """Return the ``users.info`` data of a user ID, cached for a while"""
+        if monotonic() - self._users_cache_timestamp < USERS_CACHE_TTL:
+            user = self._users_by_id.get(id_)
+            if user is not None:
+                return user
+        user = self._users_info_cache.get(id_)
+        if user is None:
+            user = self.webclient.users_info(user=id_)["user"]
+            if user is not None:
+                self._users_info_cache[id_] = user
+        return user
+
     def username_to_userid(self, name: str):
-        """Convert a Slack user name to their user ID"""
-        name = name.lstrip("@")
-        user = [
-            user
-            for user in self.webclient.users_list()["members"]
-            if user["name"] == name
-        ]
-        if user == []:
+        """Convert a Slack user name (or email address, or mention) to their user ID"""
+        if MENTION_REGEX.fullmatch(name):
+            return self._mention_to_userid(name)
+        name = name.removeprefix("@")
+        if name.find("@") > 0:
+            # Slack user names cannot contain "@", this can only be an email.
+            return self._email_to_userid(name)
+        user = self._get_users_by_name().get(name)
+        if not user and self._refresh_users(max_age=USERS_CACHE_MISS_REFRESH_AGE):
+            user = self._users_by_name.get(name)
+        if not user:
             raise UserDoesNotExistError(f"Cannot find user {name}.")
         if len(user) > 1:
             log.error(
@@ -581,24 +914,470 @@ class SlackBoltBackend(ErrBot):
             raise UserNotUniqueError(f"Failed to uniquely identify {name}.")
         return user[0]["id"]
 
+    def usernames_to_userids(self, names):
+        """
+        Convert several Slack user names to their user IDs at once.
+
+        All the names are resolved against a single fetch of the users
+        directory, instead of one lookup per name.
+
+        :returns:
+            A dict mapping names to user IDs. Names which cannot be resolved
+            to exactly one user are left out.
+        """
+        userids = {}
+        for name in names:
+            try:
+                userids[name] = self.username_to_userid(name)
+            except (
+                UserDoesNotExistError,
+                UserNotUniqueError,
+                SlackApiError,
+                SlackAPIResponseError,
+            ) as e:
+                log.debug("Cannot resolve user %s: %s", name, e)
+        return userids
+
+    def _mention_to_userid(self, mention: str):
+        """Check the user ID of a ``<@U12345>`` mention with ``users.info``"""
+        userid = mention[2:-1].partition("|")[0]
+        try:
+            user = self._user_info(userid)
+        except SlackApiError as e:
+            if e.response["error"] == "user_not_found":
+                raise UserDoesNotExistError(f"Cannot find user with ID {userid}.")
+            raise
+        if user is None:
+            raise UserDoesNotExistError(f"Cannot find user with ID {userid}.")
+        return userid
+
+    def _email_to_userid(self, email: str):
+        """Convert a Slack user email to their user ID with ``users.lookupByEmail``"""
+        userid = self._userids_by_email.get(email)
+        if userid is not None:
+            return userid
+        if self._missing_emails.get(email):
+            raise UserDoesNotExistError(f"Cannot find user with email {email}.")
+        try:
+            user = self.webclient.users_lookupByEmail(email=email)["user"]
+        except SlackApiError as e:
+            if e.response["error"] == "users_not_found":
+                self._missing_emails[email] = True
+                raise UserDoesNotExistError(f"Cannot find user with email {email}.")
+            raise
+        self._userids_by_email[email] = user["id"]
+        return user["id"]
+
+    def _get_users_by_name(self):
+        """
+        Return the users directory of the workspace indexed by user name.
+
+        The whole ``users.list`` pagination is fetched once and kept for
+        ``USERS_CACHE_TTL`` seconds, so that lookups don't cost API calls.
+        Once expired, the directory is still served while it is refreshed in
+        the background.
+        """
+        if self._users_cache_younger_than(USERS_CACHE_TTL):
+            return self._users_by_name
+        if not self._users_by_name:
+            self._refresh_users()
+        else:
+            self._refresh_users_in_background()
+        return self._users_by_name
+
+    def _refresh_users_in_background(self):
+        """Start refreshing the users directory in a thread, unless one is running"""
+        # Errbot's thread pool only exists with BOT_ASYNC, and is replaced
+        # around some commands: use a thread of our own.
+        if monotonic() < self._users_refresh_not_before:
+            return  # the last refresh failed, wait before trying again
+        if not self._users_cache_lock.acquire(blocking=False):
+            return  # a refresh is running already
+        try:
+            if self._users_refresh_thread and self._users_refresh_thread.is_alive():
+                return
+            self._users_refresh_thread = threading.Thread(
+                target=self._refresh_users_logging_errors,
+                name="slackbolt-users-refresh",
+                daemon=True,
+            )
+            self._users_refresh_thread.start()
+        finally:
+            self._users_cache_lock.release()
+
+    def _refresh_users_logging_errors(self):
+        try:
+            self._refresh_users()
+        except Exception:
+            log.exception("Failed to refresh the users directory")
+
+    def _refresh_users(self, max_age=USERS_CACHE_TTL):
+        """
+        Fetch the users directory from Slack, unless it is younger than ``max_age``.
+
+        :returns: True if the directory was fetched
+        """
+        # Bolt runs listeners in worker threads: make concurrent lookups wait
+        # for a single fetch instead of each walking the whole pagination.
+        with self._users_cache_lock:
+            if self._users_cache_younger_than(max_age):
+                return False
+            wait = self._users_refresh_not_before - monotonic()
+            if wait > 0:
+                # Don't ask Slack again right after it failed or rate limited us.
+                if self._users_by_name:
+                    return False
+                raise SlackAPIResponseError(
+                    "Cannot fetch the users directory from Slack, "
+                    f"next attempt in {wait:.0f} seconds.",
+                    error="users_directory_unavailable",
+                )
+
+            users = []
+            complete = True
+            try:
+                for member in self._paginate(
+                    self.webclient.users_list,
+                    "members",
+                    max_wait=USERS_REFRESH_MAX_WAIT,
+                    limit=USERS_PAGE_LIMIT,
+                ):
+                    users.append(self._slim_user(member))
+            except SlackPaginationError as e:
+                log.warning("Fetched an incomplete users directory: %s", e)
+                complete = False
+            except Exception as e:
+                delay = USERS_REFRESH_FAILURE_DELAY
+                if isinstance(e, SlackApiError) and e.response.status_code == 429:
+                    delay = max(delay, self._retry_after(e))
+                self._users_refresh_not_before = monotonic() + delay
+                raise
+            log.debug("Fetched %d users from Slack", len(users))
+            self._set_users(users, monotonic(), complete)
+        if complete:
+            self._save_users_snapshot(users)
+        return True
+
+    def _users_cache_younger_than(self, max_age):
+        """Tell whether the users directory was fetched less than ``max_age`` ago"""
+        if not self._users_cache_complete:
+            # Users may be missing, ask Slack again as soon as for a missed name.
+            max_age = min(max_age, USERS_CACHE_MISS_REFRESH_AGE)
+        return monotonic() - self._users_cache_timestamp < max_age
+
+    def _set_users(self, users, timestamp, complete=True):
+        """Replace the users directory and the indexes built from it"""
+        # Build every index before replacing any, so that bad data leaves the
+        # current directory as it is.
+        users_by_name = self._index_users_by_name(users)
+        users_by_id = {user["id"]: user for user in users}
+        userids_by_email = {
+            user["profile"]["email"]: user["id"]
+            for user in users
+            if user["profile"]["email"]
+        }
+        self._users_by_name = users_by_name
+        self._users_by_id = users_by_id
+        self._userids_by_email = userids_by_email
+        self._users_cache_timestamp = timestamp
+        self._users_cache_complete = complete
+
+    def _update_user(self, user):
+        """Replace a single user of the users directory, and what was derived from it"""
+        userid, email = user["id"], user["profile"]["email"]
+        # Wait for a refresh in progress, which would otherwise install the
+        # directory it fetched before the change.
+        with self._users_cache_lock:
+            if self._users_by_id:  # else the next lookup fetches it all
+                old = self._users_by_id.get(userid)
+                if old is not None:
+                    self._unindex_user(old)
+                self._users_by_id[userid] = user
+                self._users_by_name[user["name"]] = [
+                    *self._users_by_name.get(user["name"], ()),
+                    user,
+                ]
+                if email:
+                    self._userids_by_email[email] = userid
+        self._users_info_cache.discard(userid)
+        if email:
+            self._missing_emails.discard(email)
+        self._identifiers_cache.discard_matching(lambda ids: ids[0] == userid)
+
+    def _unindex_user(self, user):
+        """Remove a user of the directory from the name and email indexes"""
+        namesakes = [
+            namesake
+            for namesake in self._users_by_name.get(user["name"], ())
+            if namesake["id"] != user["id"]
+        ]
+        if namesakes:
+            self._users_by_name[user["name"]] = namesakes
+        else:
+            self._users_by_name.pop(user["name"], None)
+        email = user["profile"]["email"]
+        if email and self._userids_by_email.get(email) == user["id"]:
+            del self._userids_by_email[email]
+
+    def _users_snapshot_path(self):
+        return Path(self.bot_config.BOT_DATA_DIR) / USERS_SNAPSHOT_FILENAME
+
+    def _load_users_snapshot(self):
+        """Seed the users directory from the copy saved by a previous run"""
+        try:
+            with self._users_snapshot_path().open() as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            log.warning("Ignoring unreadable users snapshot: %s", e)
+            return
+
+        try:
+            if snapshot.get("team_id") != self._team_id:
+                log.debug("Ignoring users snapshot of another workspace")
+                return
+            age = time() - snapshot["saved_at"]
+            if age < 0:
+                # Saved by a clock ahead of ours (or another host's), it could
+                # be older than it looks: use it, but fetch the users again.
+                age = USERS_CACHE_TTL
+            if age > USERS_SNAPSHOT_MAX_AGE:
+                log.debug("Ignoring users snapshot saved %d seconds ago", age)
+                return
+            self._set_users(snapshot["users"], monotonic() - age)
+        except (KeyError, TypeError, AttributeError) as e:
+            log.warning("Ignoring malformed users snapshot: %r", e)
+            return
+        log.debug("Loaded %d users from snapshot", len(snapshot["users"]))
+
+    def _save_users_snapshot(self, users):
+        """
+        Save the users directory, so that next runs don't start cold.
+
+        It is only saved after fetching all the users: changes of single users
+        (see :meth:`_update_user`) are fetched again after a restart.
+        """
+        path = self._users_snapshot_path()
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            # Email addresses are saved too, keep them to the bot's user.
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with open(fd, "w") as f:
+                json.dump(
+                    {"saved_at": time(), "team_id": self._team_id, "users": users}, f
+                )
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log.warning("Failed to save users snapshot to %s: %s", path, e)
+
+    def clear_users_cache(self):
+        """Forget the users directory, so that next lookups ask Slack again"""
+        with self._users_cache_lock:
+            self._forget_users()
+        try:
+            self._users_snapshot_path().unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            log.warning("Failed to remove users snapshot: %s", e)
+
+    def _forget_users(self):
+        self._users_by_name = {}
+        self._users_by_id = {}
+        self._userids_by_email = {}
+        self._users_cache_timestamp = float("-inf")
+        self._users_cache_complete = True
+        self._users_info_cache.clear()
+        self._missing_emails.clear()
+        self._identifiers_cache.clear()
+
+    @staticmethod
+    def _slim_user(member):
+        """Keep only the fields of a ``users.list`` member used by the backend"""
+        return {
+            "id": member["id"],
+            "name": member["name"],
+            "real_name": member.get("real_name"),
+            "profile": {"email": (member.get("profile") or {}).get("email")},
+        }
+
+    @staticmethod
+    def _paginate(method, key, max_wait=None, **kwargs):
+        """
+        Iterate over the items returned by a cursor paginated Slack API method.
+
+        Pages are requested lazily, so callers which stop iterating early don't
+        pay for the remaining API calls. :class:`SlackPaginationError` is raised
+        when Slack keeps returning a cursor after too many (or empty) pages.
+
+        :param method: The WebClient method to call, e.g. ``webclient.users_list``
+        :param key: The key of the response holding the items, e.g. ``"members"``
+        :param max_wait:
+            The longest total time (in seconds) to wait on rate limits, after
+            which the rate limit error is raised
+        :param kwargs: Extra arguments passed to every call of ``method``
+        """
+        deadline = None if max_wait is None else monotonic() + max_wait
+        cursor = None
+        empty_pages = 0
+        for _ in range(PAGINATION_MAX_PAGES):
+            response = SlackBoltBackend._call_with_backoff(
+                method, key, deadline, cursor=cursor, **kwargs
+            )
+            items = response[key]
+            yield from items
+            cursor = response.get("response_metadata", {}).get("next_cursor")
+            if not cursor:
+                return
+            empty_pages = 0 if items else empty_pages + 1
+            if empty_pages >= PAGINATION_MAX_EMPTY_PAGES:
+                raise SlackPaginationError(
+                    f"Stopped paginating {key} after {empty_pages} empty pages in a row"
+                )
+        raise SlackPaginationError(
+            f"Stopped paginating {key} after {PAGINATION_MAX_PAGES} pages"
+        )
+
+    @staticmethod
+    def _call_with_backoff(method, key, deadline, **kwargs):
+        """
+        Call ``method``, waiting and retrying while Slack rate limits it.
+
+        Waits which would end after the ``deadline`` (a :func:`monotonic` time,
+        or None) are not done, the rate limit error is raised instead.
+        """
+        for attempt in range(PAGINATION_RETRY_LIMIT + 1):
+            try:
+                return method(**kwargs)
+            except SlackApiError as e:
+                if e.response.status_code != 429 or attempt == PAGINATION_RETRY_LIMIT:
+                    raise
+                retry_after = SlackBoltBackend._retry_after(e)
+                # Only the backoff is capped, a shorter wait than Slack's
+                # would just be rate limited again.
+                delay = max(
+                    retry_after,
+                    min(
+                        PAGINATION_RETRY_MAX_DELAY,
+                        retry_after + random.uniform(0, 2**attempt),
+                    ),
+                )
+                if deadline is not None and monotonic() + delay > deadline:
+                    raise
+                log.warning(
+                    "Rate limited while paginating %s, retrying in %.1f seconds.",
+                    key,
+                    delay,
+                )
+                sleep(delay)
+
+    @staticmethod
+    def _retry_after(error):
+        """Return the seconds a rate limited Slack API call asks to wait, 1 if unsaid"""
+        return int(
+            next(
+                (
+                    value
+                    for name, value in error.response.headers.items()
+                    if name.lower() == "retry-after"
+                ),
+                1,
+            )
+        )
+
+    @staticmethod
+    def _index_users_by_name(members):
+        """
+        Group ``users.list`` members by their user name.
+
+        Names are mapped to a list of members so that callers can still detect
+        names which are not unique.
+        """
+        index = {}
+        for member in members:
+            index.setdefault(member["name"], []).append(member)
+        return index
+
+    def channelid_to_channel(self, id_: str):
+        """Return the ``conversations.info`` data of a channel ID, cached a while"""
+        channel = self._conversations_cache.get(id_)
+        if channel is None:
+            try:
+                channel = self.webclient.conversations_info(channel=id_)["channel"]
+            except SlackApiError as e:
+                if e.response["error"] == "channel_not_found":
+                    raise RoomDoesNotExistError(f"No channel with ID {id_} exists.")
+                raise
+            if channel is not None:
+                self._conversations_cache[id_] = channel
+                if "name" in channel:  # direct message channels have none
+                    self._channelids_by_name[channel["name"]] = id_
+        return channel
+
     def channelid_to_channelname(self, id_: str):
         """Convert a Slack channel ID to its channel name"""
-        channel = self.webclient.conversations_info(channel=id_)["channel"]
+        channel = self.channelid_to_channel(id_)
         if channel is None:
             raise RoomDoesNotExistError(f"No channel with ID {id_} exists.")
         return channel["name"]
 
+    def get_room(self, channelid: str):
+        """
+        Return the :class:`~SlackRoom` of a channel ID.
+
+        Rooms are kept a while, and shared by every message and occupant
+        of that channel meanwhile.
+        """
+        room = self._rooms.get(channelid)
+        if room is None:
+            room = SlackRoom(webclient=self.webclient, channelid=channelid, bot=self)
+            self._rooms[channelid] = room
+        return room
+
+    def clear_conversations_cache(self):
+        """Forget fetched channels, so that next lookups ask Slack again"""
+        self._conversations_cache.clear()
+        self._channelids_by_name.clear()
+        self._rooms.clear()
+        self._im_channels_cache.clear()
+        self._identifiers_cache.clear()
+
     def channelname_to_channelid(self, name: str):
         """Convert a Slack channel name to its channel ID"""
-        name = name.lstrip("#")
-        channel = [
-            channel
-            for channel in self.webclient.channels_list()
-            if channel.name == name
-        ]
-        if not channel:
+        name = name.removeprefix("#")
+        channelid = self._channelids_by_name.get(name)
+        if channelid is not None:
+            return channelid
+
+        # Pages are fetched lazily: stop calling conversations.list once found.
+        try:
+            channel = next(
+                (
+                    channel
+                    for channel in self._paginate(
+                        self.webclient.conversations_list,
+                        "channels",
+                        max_wait=CONVERSATIONS_LOOKUP_MAX_WAIT,
+                        limit=CONVERSATIONS_PAGE_LIMIT,
+                    )
+                    if channel["name"] == name
+                ),
+                None,
+            )
+        except SlackPaginationError as e:
+            raise RoomDoesNotExistError(f"No channel named {name} found: {e}")
+        except SlackApiError as e:
+            if e.response.status_code != 429:
+                raise
+            log.warning("Rate limited while looking up channel %s", name)
+            raise RoomDoesNotExistError(
+                f"Cannot look up channel {name}, Slack is rate limiting requests."
+            )
+        if channel is None:
             raise RoomDoesNotExistError(f"No channel named {name} exists")
-        return channel[0].id
+        self._channelids_by_name[name] = channel["id"]
+        return channel["id"]
 
     def channels(self, exclude_archived=True, joined_only=False):
         """
@@ -631,18 +1410,22 @@ class SlackBoltBackend(ErrBot):
 
         return channels + groups
 
-    @lru_cache(1024)
     def get_im_channel(self, id_):
         """Open a direct message channel to a user"""
+        channelid = self._im_channels_cache.get(id_)
+        if channelid is not None:
+            return channelid
         try:
-            response = self.webclient.im_open(user=id_)
-            return response["channel"]["id"]
-        except SlackAPIResponseError as e:
-            if e.error == "cannot_dm_bot":
+            response = self.webclient.conversations_open(users=id_)
+        except SlackApiError as e:
+            if e.response["error"] == "cannot_dm_bot":
                 log.info("Tried to DM a bot.")
                 return None
             else:
                 raise e
+        channelid = response["channel"]["id"]
+        self._im_channels_cache[id_] = channelid
+        return channelid
 
     def _prepare_message(self, msg):  # or card
         """
@@ -713,27 +1496,23 @@ class SlackBoltBackend(ErrBot):
                 to_humanreadable,
                 to_channel_id,
             )
-            body = self.md.convert(msg.body)
+            # Markdown keeps references and stashed HTML between conversions,
+            # so reset it for every message (and don't share it meanwhile).
+            with self._md_lock:
+                body = self.md.reset().convert(msg.body)
             log.debug("Message size: %d.", len(body))
 
             limit = min(self.bot_config.MESSAGE_SIZE_LIMIT, SLACK_MESSAGE_LIMIT)
             parts = self.prepare_message_body(body, limit)
 
+            data = {"channel": to_channel_id, **POST_MESSAGE_DEFAULTS}
+            # Keep the thread_ts to answer to the same thread.
+            if "thread_ts" in msg.extras:
+                data["thread_ts"] = msg.extras["thread_ts"]
+
             timestamps = []
             for part in parts:
-                data = {
-                    "channel": to_channel_id,
-                    "text": part,
-                    "unfurl_media": "true",
-                    "link_names": "1",
-                    "as_user": "true",
-                }
-
-                # Keep the thread_ts to answer to the same thread.
-                if "thread_ts" in msg.extras:
-                    data["thread_ts"] = msg.extras["thread_ts"]
-
-                result = self.webclient.chat_postMessage(**data)
+                result = self.webclient.chat_postMessage(text=part, **data)
                 timestamps.append(result["ts"])
 
             msg.extras["ts"] = timestamps
@@ -824,16 +1603,19 @@ class SlackBoltBackend(ErrBot):
         parts = self.prepare_message_body(card.body, limit)
         part_count = len(parts)
         footer = attachment.get("footer", "")
-        for i in range(part_count):
-            if part_count > 1:
-                attachment["footer"] = f"{footer} [{i + 1}/{part_count}]"
-            attachment["text"] = parts[i]
-            data = {
-                "channel": to_channel_id,
-                "attachments": json.dumps([attachment]),
-                "link_names": "1",
-                "as_user": "true",
-            }
+        # Only the text and the footer change between parts: serialize the rest
+        # of the attachment once, and splice each part's fields into it.
+        common = json.dumps(attachment, separators=(",", ":"))[1:-1]
+        if common:
+            common += ","
+        numbered = part_count > 1
+        data = {"channel": to_channel_id, "link_names": "1", "as_user": "true"}
+        for number, part in enumerate(parts, start=1):
+            part_fields = {"text": part}
+            if numbered:
+                part_fields["footer"] = f"{footer} [{number}/{part_count}]"
+            part_json = json.dumps(part_fields, separators=(",", ":"))
+            data["attachments"] = f"[{{{common}{part_json[1:]}]"
             try:
                 log.debug("Sending data:\n%s", data)
                 self.webclient.chat_postMessage(**data)
@@ -855,38 +1637,23 @@ class SlackBoltBackend(ErrBot):
         """
         Returns the parts of a message chunked and ready for sending.
 
-        This is a staticmethod for easier testing.
+        This is a staticmethod for easier testing. The parts of bodies of up to
+        ``PREPARED_BODY_CACHE_MAX_LENGTH`` characters are cached.
 
         Args:
             body (str)
-            size_limit (int): chunk the body into sizes capped at this maximum
+            size_limit (int): chunk the body into parts of at most this many bytes
 
         Returns:
-            [str]
+            (str,)
 
         """
-        fixed_format = body.startswith("```")  # hack to fix the formatting
-        parts = list(split_string_after(body, size_limit))
-
-        if len(parts) == 1:
-            # If we've got an open fixed block, close it out
-            if parts[0].count("```") % 2 != 0:
-                parts[0] += "\n```\n"
-        else:
-            for i, part in enumerate(parts):
-                starts_with_code = part.startswith("```")
-
-                # If we're continuing a fixed block from the last part
-                if fixed_format and not starts_with_code:
-                    parts[i] = "```\n" + part
-
-                # If we've got an open fixed block, close it out
-                if part.count("```") % 2 != 0:
-                    parts[i] += "\n```\n"
-
-        return parts
+        if len(body) > PREPARED_BODY_CACHE_MAX_LENGTH:
+            return _prepare_message_body(body, size_limit)
+        return _cached_prepare_message_body(body, size_limit)
 
     @staticmethod
+    @lru_cache(maxsize=IDENTIFIERS_CACHE_SIZE)
     def extract_identifiers_from_string(text):
         """
         Parse a string for Slack user/channel IDs.
@@ -951,8 +1718,24 @@ class SlackBoltBackend(ErrBot):
         Build a :class:`SlackIdentifier` from the given string txtrep.
 
         Supports strings with the formats accepted by
-        :func:`~extract_identifiers_from_string`.
+        :func:`~extract_identifiers_from_string`. The IDs they resolve to are
+        cached a while, but each call builds a new identifier.
         """
+        ids = self._identifiers_cache.get(txtrep)
+        if ids is None:
+            ids = self._resolve_identifier(txtrep)
+            self._identifiers_cache[txtrep] = ids
+        userid, channelid = ids
+        if userid is not None and channelid is not None:
+            return SlackRoomOccupant(self.webclient, userid, channelid, bot=self)
+        if userid is not None:
+            return SlackPerson(
+                self.webclient, userid, self.get_im_channel(userid), bot=self
+            )
+        return SlackRoom(webclient=self.webclient, channelid=channelid, bot=self)
+
+    def _resolve_identifier(self, txtrep):
+        """Return the user ID and the channel ID txtrep refers to, either may be None"""
         log.debug("building an identifier from %s.", txtrep)
         username, userid, channelname, channelid = self.extract_identifiers_from_string(
             txtrep
@@ -962,17 +1745,12 @@ class SlackBoltBackend(ErrBot):
             userid = self.username_to_userid(username)
         if channelid is None and channelname is not None:
             channelid = self.channelname_to_channelid(channelname)
-        if userid is not None and channelid is not None:
-            return SlackRoomOccupant(self.webclient, userid, channelid, bot=self)
-        if userid is not None:
-            return SlackPerson(self.webclient, userid, self.get_im_channel(userid))
-        if channelid is not None:
-            return SlackRoom(webclient=self.webclient, channelid=channelid, bot=self)
-
-        raise Exception(
-            "You found a bug. I expected at least one of userid, channelid, username or channelname "
-            "to be resolved but none of them were. This shouldn't happen so, please file a bug."
-        )
+        if userid is None and channelid is None:
+            raise Exception(
+                "You found a bug. I expected at least one of userid, channelid, username or channelname "
+                "to be resolved but none of them were. This shouldn't happen so, please file a bug."
+            )
+        return userid, channelid
 
     def is_from_self(self, msg: Message) -> bool:
         return self.bot_identifier.userid == msg.frm.userid
@@ -980,9 +1758,10 @@ class SlackBoltBackend(ErrBot):
     def build_reply(self, msg, text=None, private=False, threaded=False):
         response = self.build_message(text)
 
-        if "thread_ts" in msg.extras["slack_event"]:
+        thread_ts = msg.extras["slack_event"].get("thread_ts")
+        if thread_ts is not None:
             # If we reply to a threaded message, keep it in the thread.
-            response.extras["thread_ts"] = msg.extras["slack_event"]["thread_ts"]
+            response.extras["thread_ts"] = thread_ts
         elif threaded:
             # otherwise check if we should start a new thread
             response.parent = msg
@@ -1037,10 +1816,9 @@ class SlackBoltBackend(ErrBot):
                 raise SlackAPIResponseError(error=e.error)
 
     def _ts_for_message(self, msg):
-        try:
-            return msg.extras["slack_event"]["message"]["ts"]
-        except KeyError:
-            return msg.extras["slack_event"]["ts"]
+        event = msg.extras["slack_event"]
+        # Edited messages carry the timestamp of the original message.
+        return event.get("message", event)["ts"]
 
     def shutdown(self):
         super().shutdown()
@@ -1052,13 +1830,11 @@ class SlackBoltBackend(ErrBot):
     def query_room(self, room):
         """ Room can either be a name or a channelid """
         if room.startswith("C") or room.startswith("G"):
-            return SlackRoom(webclient=self.webclient, channelid=room, bot=self)
+            return self.get_room(room)
 
         m = SLACK_CLIENT_CHANNEL_HYPERLINK.match(room)
         if m is not None:
-            return SlackRoom(
-                webclient=self.webclient, channelid=m.groupdict()["id"], bot=self
-            )
+            return self.get_room(m.groupdict()["id"])
 
         return SlackRoom(webclient=self.webclient, name=room, bot=self)
 
@@ -1070,10 +1846,7 @@ class SlackBoltBackend(ErrBot):
             A list of :class:`~SlackRoom` instances.
         """
         channels = self.channels(joined_only=True, exclude_archived=True)
-        return [
-            SlackRoom(webclient=self.webclient, channelid=channel["id"], bot=self)
-            for channel in channels
-        ]
+        return [self.get_room(channel["id"]) for channel in channels]
 
     def prefix_groupchat_reply(self, message, identifier):
         super().prefix_groupchat_reply(message, identifier)
@@ -1090,11 +1863,31 @@ class SlackBoltBackend(ErrBot):
         :returns:
             string
         """
-        text = re.sub(r"<([^|>]+)\|([^|>]+)>", r"\2", text)
-        text = re.sub(r"<(http([^>]+))>", r"\1", text)
+        text = LABELLED_URI_REGEX.sub(r"\2", text)
+        text = BARE_URI_REGEX.sub(r"\1", text)
 
         return text
 
+    def _process_markup(self, text):
+        """
+        Process mentions and sanitize URIs of a message text in a single pass.
+
+        As Slack escapes literal ``<`` and ``>`` in message texts, this gives
+        the same result as :meth:`process_mentions` followed by
+        :meth:`sanitize_uris`.
+        """
+        if "<" not in text:  # no markup at all, the common case
+            return text, []
+        mentioned = []
+
+        def replace(match):
+            word = match["mention"]
+            if word is None:
+                return match["label"] or match["uri"]
+            return self._replace_mention(word, mentioned) or self.sanitize_uris(word)
+
+        return MESSAGE_MARKUP_REGEX.sub(replace, text), mentioned
+
     def process_mentions(self, text):
         """
         Process mentions in a given string
@@ -1102,28 +1895,37 @@ class SlackBoltBackend(ErrBot):
             A formatted string of the original message
             and a list of :class:`~SlackPerson` instances.
         """
+        if "<@" not in text:
+            return text, []
         mentioned = []
 
-        m = re.findall("<@[^>]*>*", text)
+        def replace(match):
+            return self._replace_mention(match[0], mentioned) or match[0]
 
-        for word in m:
-            try:
-                identifier = self.build_identifier(word)
-            except Exception as e:
-                log.debug(
-                    "Tried to build an identifier from '%s' but got exception: %s",
-                    word,
-                    e,
-                )
-                continue
+        return MENTION_REGEX.sub(replace, text), mentioned
 
-            # We only track mentions of persons.
-            if isinstance(identifier, SlackPerson):
-                log.debug("Someone mentioned")
-                mentioned.append(identifier)
-                text = text.replace(word, str(identifier))
+    def _replace_mention(self, word, mentioned):
+        """
+        Return the text replacing a mention, and add the person to ``mentioned``.
 
-        return text, mentioned
+        :returns: None if the mention is not one of a person
+        """
+        try:
+            identifier = self.build_identifier(word)
+        except Exception as e:
+            log.debug(
+                "Tried to build an identifier from '%s' but got exception: %s",
+                word,
+                e,
+            )
+            return None
+
+        # We only track mentions of persons.
+        if isinstance(identifier, SlackPerson):
+            log.debug("Someone mentioned")
+            mentioned.append(identifier)
+            return str(identifier)
+        return None
 
 
 class SlackRoom(Room):
@@ -1139,9 +1941,13 @@ class SlackRoom(Room):
         else:
             self._name = bot.channelid_to_channelname(channelid)
 
-        self._id = None
+        self._id = channelid
+        # Only IDs looked up by name are looked up again, e.g. once left.
+        self._id_from_name = channelid is None
         self._bot = bot
         self.webclient = webclient
+        self._info = None
+        self._info_timestamp = float("-inf")
 
     def __str__(self):
         return f"#{self.name}"
@@ -1155,35 +1961,38 @@ class SlackRoom(Room):
         """
         The channel object exposed by SlackClient
         """
-        _id = None
-        for channel in self.webclient.conversations_list()["channels"]:
-            if channel["name"] == self.name:
-                _id = channel["id"]
-                break
-        else:
+        try:
+            return self._bot.channelname_to_channelid(self.name)
+        except RoomDoesNotExistError:
             raise RoomDoesNotExistError(
                 f"{str(self)} does not exist (or is a private group you don't have access to)"
             )
-        return _id
 
     @property
     def _channel_info(self):
         """
         Channel info as returned by the Slack API.
 
+        It is kept for ``ROOM_INFO_CACHE_TTL`` seconds, or until the room is
+        changed through this object.
+
         See also:
-          * https://api.slack.com/methods/channels.list
-          * https://api.slack.com/methods/groups.list
+          * https://api.slack.com/methods/conversations.info
         """
-        if self.private:
-            return self._bot.webclient.conversations_info(channel=self.id)["group"]
-        else:
-            return self._bot.webclient.conversations_info(channel=self.id)["channel"]
+        if monotonic() - self._info_timestamp >= ROOM_INFO_CACHE_TTL:
+            self._info = self._bot.webclient.conversations_info(channel=self.id)[
+                "channel"
+            ]
+            self._info_timestamp = monotonic()
+        return self._info
+
+    def _forget_channel_info(self):
+        self._info_timestamp = float("-inf")
 
     @property
     def private(self):
         """Return True if the room is a private group"""
-        return self._channel.id.startswith("G")
+        return self.id.startswith("G")
 
     @property
     def id(self):
@@ -1217,7 +2026,9 @@ class SlackRoom(Room):
                 raise RoomError(f"Unable to leave channel. {USER_IS_BOT_HELPTEXT}")
             else:
                 raise RoomError(e)
-        self._id = None
+        if self._id_from_name:
+            self._id = None
+        self._forget_channel_info()
 
     def create(self, private=False):
         try:
@@ -1232,6 +2043,7 @@ class SlackRoom(Room):
                 raise RoomError(f"Unable to create channel. {USER_IS_BOT_HELPTEXT}")
             else:
                 raise RoomError(e)
+        self._forget_channel_info()
 
     def destroy(self):
         try:
@@ -1246,17 +2058,19 @@ class SlackRoom(Room):
                 raise RoomError(f"Unable to archive channel. {USER_IS_BOT_HELPTEXT}")
             else:
                 raise RoomError(e)
-        self._id = None
+        if self._id_from_name:
+            self._id = None
+        self._forget_channel_info()
 
     @property
     def exists(self):
         channels = self._bot.channels(joined_only=False, exclude_archived=False)
-        return len([c for c in channels if c["name"] == self.name]) > 0
+        return any(c["name"] == self.name for c in channels)
 
     @property
     def joined(self):
         channels = self._bot.channels(joined_only=True)
-        return len([c for c in channels if c["name"] == self.name]) > 0
+        return any(c["name"] == self.name for c in channels)
 
     @property
     def topic(self):
@@ -1277,6 +2091,7 @@ class SlackRoom(Room):
             self._bot.api_call(
                 "channels.setTopic", data={"channel": self.id, "topic": topic}
             )
+        self._forget_channel_info()
 
     @property
     def purpose(self):
@@ -1297,6 +2112,7 @@ class SlackRoom(Room):
             self._bot.api_call(
                 "channels.setPurpose", data={"channel": self.id, "purpose": purpose}
             )
+        self._forget_channel_info()
 
     @property
     def occupants(self):
@@ -1304,10 +2120,7 @@ class SlackRoom(Room):
         return [SlackRoomOccupant(self.sc, m, self.id, self._bot) for m in members]
 
     def invite(self, *args):
-        users = {
-            user["name"]: user["id"]
-            for user in self._bot.api_call("users.list")["members"]
-        }
+        users = self._bot.usernames_to_userids(args)
         for user in args:
             if user not in users:
                 raise UserDoesNotExistError(f'User "{user}" not found.')
@@ -0,0 +1,49 @@
+import types
+from unittest import mock
+
+from errbot.bootstrap import bot_config_defaults
+
+from errbot_slack_bolt_backend.slackbolt import SlackBoltBackend
+
+
+def make_backend(data_dir, team_id="T1"):
+    """Build a backend connected to a mock WebClient, as serve_forever would"""
+    config = types.SimpleNamespace(
+        BOT_IDENTITY={"bot_token": "xoxb-test", "app_token": "xapp-test"},
+        BOT_DATA_DIR=data_dir,
+        BOT_ADMINS=(),
+        BOT_PREFIX="!",
+        BOT_ALT_PREFIXES=(),
+        BOT_ALT_PREFIX_CASEINSENSITIVE=False,
+    )
+    bot_config_defaults(config)
+    backend = SlackBoltBackend(config)
+    backend.webclient = mock.Mock()
+    backend._team_id = team_id
+    return backend
+
+
+def member(userid, name, email=None):
+    """Return a users.list member"""
+    return {
+        "id": userid,
+        "name": name,
+        "real_name": name.title(),
+        "profile": {"email": email},
+    }
+
+
+def paginated_users(members, page_size=2):
+    """Return a fake users.list serving ``members`` over several pages"""
+
+    def users_list(cursor=None, limit=None):
+        start = int(cursor or 0)
+        end = start + page_size
+        return {
+            "members": members[start:end],
+            "response_metadata": {
+                "next_cursor": str(end) if end < len(members) else ""
+            },
+        }
+
+    return users_list
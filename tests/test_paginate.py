@@ -0,0 +1,61 @@
+import unittest
+from unittest import mock
+
+from slack_sdk.errors import SlackApiError
+
+from errbot_slack_bolt_backend import slackbolt
+from errbot_slack_bolt_backend.slackbolt import SlackBoltBackend
+
+
+def page(members, next_cursor=""):
+    return {"members": members, "response_metadata": {"next_cursor": next_cursor}}
+
+
+def rate_limited(retry_after):
+    response = mock.Mock(status_code=429, headers={"Retry-After": str(retry_after)})
+    return SlackApiError("ratelimited", response)
+
+
+@mock.patch.object(slackbolt.random, "uniform", return_value=0.5)
+@mock.patch.object(slackbolt, "sleep")
+class PaginateBackoffTest(unittest.TestCase):
+    def test_resume_from_same_cursor(self, sleep, uniform):
+        method = mock.Mock(
+            side_effect=[page(["a"], "c1"), rate_limited(30), page(["b"])]
+        )
+        items = list(SlackBoltBackend._paginate(method, "members", limit=1))
+
+        self.assertEqual(items, ["a", "b"])
+        self.assertEqual(
+            method.call_args_list,
+            [
+                mock.call(cursor=None, limit=1),
+                mock.call(cursor="c1", limit=1),
+                mock.call(cursor="c1", limit=1),
+            ],
+        )
+        sleep.assert_called_once()
+        self.assertGreaterEqual(sleep.call_args[0][0], 30)
+
+    def test_never_wait_less_than_retry_after(self, sleep, uniform):
+        retry_after = slackbolt.PAGINATION_RETRY_MAX_DELAY + 60
+        method = mock.Mock(side_effect=[rate_limited(retry_after), page(["a"])])
+        self.assertEqual(list(SlackBoltBackend._paginate(method, "members")), ["a"])
+        sleep.assert_called_once_with(retry_after)
+
+    def test_waits_grow_across_rate_limits(self, sleep, uniform):
+        uniform.side_effect = lambda low, high: high
+        method = mock.Mock(side_effect=[rate_limited(1)] * 3 + [page(["a"])])
+        list(SlackBoltBackend._paginate(method, "members"))
+        delays = [call[0][0] for call in sleep.call_args_list]
+        self.assertEqual(delays, [2, 3, 5])
+
+    def test_raise_once_max_wait_is_spent(self, sleep, uniform):
+        method = mock.Mock(side_effect=[rate_limited(30), page(["a"])])
+        with self.assertRaises(SlackApiError):
+            list(SlackBoltBackend._paginate(method, "members", max_wait=10))
+        sleep.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from errbot_slack_bolt_backend.slackbolt import SlackBoltBackend, split_message_body
+
+LIMIT = 4096
+
+
+def byte_lengths(parts):
+    return [len(part.encode("utf-8")) for part in parts]
+
+
+class SplitMessageBodyTest(unittest.TestCase):
+    def test_empty_body(self):
+        self.assertEqual(list(split_message_body("", LIMIT)), [""])
+
+    def test_break_after_newline(self):
+        body = "a" * 3000 + "\n" + "b" * 3000
+        self.assertEqual(
+            list(split_message_body(body, LIMIT)), ["a" * 3000 + "\n", "b" * 3000]
+        )
+
+    def test_no_single_space_part(self):
+        body = "a" * LIMIT + " " + "b" * 5000
+        parts = list(split_message_body(body, LIMIT))
+        self.assertEqual("".join(parts), body)
+        self.assertEqual(byte_lengths(parts), [4096, 4096, 905])
+
+    def test_no_whitespace_only_part(self):
+        body = "a" * LIMIT + " " * 5000 + "b"
+        for part in split_message_body(body, LIMIT):
+            self.assertTrue(part.strip())
+
+    def test_multibyte_characters_are_kept_whole(self):
+        body = "é" * 3000
+        parts = list(split_message_body(body, LIMIT))
+        self.assertEqual("".join(parts), body)
+        self.assertTrue(all(length <= LIMIT for length in byte_lengths(parts)))
+
+
+class PrepareMessageBodyTest(unittest.TestCase):
+    def test_empty_body(self):
+        self.assertEqual(SlackBoltBackend.prepare_message_body("", LIMIT), ("",))
+
+    def test_short_body(self):
+        self.assertEqual(SlackBoltBackend.prepare_message_body("hi", LIMIT), ("hi",))
+
+    def test_no_fence_only_part(self):
+        body = "```\n" + "x" * 4200 + "\n```"
+        parts = SlackBoltBackend.prepare_message_body(body, LIMIT)
+        self.assertEqual(len(parts), 2)
+        for part in parts:
+            self.assertNotEqual(part.strip("`\n"), "")
+            self.assertEqual(part.count("```") % 2, 0)
+
+    def test_fenced_parts_fit_the_limit(self):
+        body = "```\n" + ("x" * 79 + "\n") * 200 + "```"
+        parts = SlackBoltBackend.prepare_message_body(body, LIMIT)
+        self.assertGreater(len(parts), 1)
+        self.assertTrue(all(length <= LIMIT for length in byte_lengths(parts)))
+        for part in parts:
+            self.assertTrue(part.startswith("```"))
+            self.assertEqual(part.count("```") % 2, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
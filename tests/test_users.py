@@ -0,0 +1,210 @@
+import tempfile
+import unittest
+from unittest import mock
+
+from errbot.backends.base import UserDoesNotExistError
+from slack_sdk.errors import SlackApiError
+
+from errbot_slack_bolt_backend import slackbolt
+from tests.helpers import make_backend, member, paginated_users
+
+
+class UsersTestCase(unittest.TestCase):
+    """Run each test with a backend of its own, and a clock it controls"""
+
+    def setUp(self):
+        data_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(data_dir.cleanup)
+        self.backend = make_backend(data_dir.name)
+        self.users_list = self.backend.webclient.users_list
+        self.now = 1000.0
+        patcher = mock.patch.object(slackbolt, "monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class IncompleteDirectoryTest(UsersTestCase):
+    def test_stop_after_empty_pages(self):
+        self.users_list.return_value = {
+            "members": [],
+            "response_metadata": {"next_cursor": "more"},
+        }
+        with self.assertRaises(UserDoesNotExistError):
+            self.backend.username_to_userid("alice")
+
+        self.assertEqual(
+            self.users_list.call_count, slackbolt.PAGINATION_MAX_EMPTY_PAGES
+        )
+        self.assertFalse(self.backend._users_cache_complete)
+        self.assertFalse(self.backend._users_snapshot_path().exists())
+
+    def test_incomplete_directory_is_fetched_again(self):
+        self.users_list.return_value = {
+            "members": [member("U1", "alice")],
+            "response_metadata": {"next_cursor": ""},
+        }
+        self.users_list.side_effect = [
+            {"members": [], "response_metadata": {"next_cursor": "more"}}
+        ] * slackbolt.PAGINATION_MAX_EMPTY_PAGES + [mock.DEFAULT]
+        with self.assertRaises(UserDoesNotExistError):
+            self.backend.username_to_userid("alice")
+
+        self.now += slackbolt.USERS_CACHE_MISS_REFRESH_AGE
+        self.assertEqual(self.backend.username_to_userid("alice"), "U1")
+        self.assertTrue(self.backend._users_cache_complete)
+        self.assertTrue(self.backend._users_snapshot_path().exists())
+
+
+class UserNameTest(UsersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.users_list.side_effect = paginated_users([member("U1", "foo")])
+
+    def test_strip_a_single_at(self):
+        self.assertEqual(self.backend.username_to_userid("foo"), "U1")
+        self.assertEqual(self.backend.username_to_userid("@foo"), "U1")
+        # Only one "@" is stripped, and no user is named "@foo".
+        with self.assertRaises(UserDoesNotExistError):
+            self.backend.username_to_userid("@@foo")
+
+
+class UsersCacheTest(UsersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.users_list.side_effect = paginated_users(
+            [member("U1", "alice"), member("U2", "bob"), member("U3", "carol")],
+            page_size=slackbolt.USERS_PAGE_LIMIT,
+        )
+
+    def test_resolve_several_names_at_once(self):
+        userids = self.backend.usernames_to_userids(["alice", "bob", "carol"])
+        self.assertEqual(userids, {"alice": "U1", "bob": "U2", "carol": "U3"})
+        self.assertEqual(self.users_list.call_count, 1)
+
+    def test_lookups_within_ttl(self):
+        self.backend.username_to_userid("alice")
+        self.now += slackbolt.USERS_CACHE_TTL - 1
+        self.backend.username_to_userid("bob")
+        self.assertEqual(self.users_list.call_count, 1)
+
+    def test_refresh_in_background_once_expired(self):
+        self.backend.username_to_userid("alice")
+        self.now += slackbolt.USERS_CACHE_TTL
+        # The expired directory is still served meanwhile.
+        self.assertEqual(self.backend.username_to_userid("bob"), "U2")
+        self.backend._users_refresh_thread.join()
+        self.assertEqual(self.users_list.call_count, 2)
+        self.assertEqual(self.backend._users_cache_timestamp, self.now)
+
+
+class UserChangeTest(UsersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.users_list.side_effect = paginated_users(
+            [
+                member("U1", "alice", "alice@example.com"),
+                member("U2", "bob", "bob@example.com"),
+            ]
+        )
+        self.backend._refresh_users()
+
+    def change_user(self, user):
+        self.backend._user_change_event_handler(
+            self.backend.webclient, {"type": "user_change", "user": user}
+        )
+
+    def test_rename(self):
+        self.change_user(member("U1", "alicia", "alicia@example.com"))
+
+        self.assertEqual(self.backend.username_to_userid("alicia"), "U1")
+        self.assertEqual(self.backend.username_to_userid("alicia@example.com"), "U1")
+        self.assertNotIn("alice", self.backend._users_by_name)
+        self.assertNotIn("alice@example.com", self.backend._userids_by_email)
+        self.assertEqual(self.backend.userid_to_username("U1"), "alicia")
+        # The rest of the directory is left as it was, and not fetched again.
+        self.assertEqual(self.backend.username_to_userid("bob"), "U2")
+        self.assertEqual(self.backend.username_to_userid("bob@example.com"), "U2")
+        self.assertEqual(self.users_list.call_count, 1)
+        self.backend.webclient.users_lookupByEmail.assert_not_called()
+
+    def test_new_user(self):
+        self.change_user(member("U3", "carol", "carol@example.com"))
+
+        self.assertEqual(self.backend.username_to_userid("carol"), "U3")
+        self.assertEqual(len(self.backend._users_by_id), 3)
+        self.assertEqual(self.users_list.call_count, 1)
+
+    def test_cached_identifier_is_forgotten(self):
+        self.backend.webclient.conversations_open.return_value = {
+            "channel": {"id": "D1"}
+        }
+        self.assertEqual(self.backend.build_identifier("@alice").username, "alice")
+
+        self.change_user(member("U1", "alicia"))
+        with self.assertRaises(UserDoesNotExistError):
+            self.backend.build_identifier("@alice")
+        self.assertEqual(self.backend.build_identifier("@alicia").username, "alicia")
+
+
+class BuildIdentifierTest(UsersTestCase):
+    def test_new_identifier_from_cached_ids(self):
+        self.users_list.side_effect = paginated_users([member("U1", "alice")])
+        self.backend.webclient.conversations_open.return_value = {
+            "channel": {"id": "D1"}
+        }
+        first = self.backend.build_identifier("@alice")
+        second = self.backend.build_identifier("@alice")
+
+        self.assertIsNot(first, second)
+        self.assertEqual((second.userid, second.channelid), ("U1", "D1"))
+        self.assertEqual(self.users_list.call_count, 1)
+        self.backend.webclient.conversations_open.assert_called_once()
+
+
+class EmailTest(UsersTestCase):
+    def test_email_of_directory(self):
+        self.users_list.side_effect = paginated_users(
+            [member("U1", "alice", "alice@example.com")]
+        )
+        self.backend._refresh_users()
+        self.users_list.reset_mock()
+
+        self.assertEqual(self.backend.username_to_userid("alice@example.com"), "U1")
+        self.users_list.assert_not_called()
+        self.backend.webclient.users_lookupByEmail.assert_not_called()
+
+    def test_lookup_by_email(self):
+        lookup = self.backend.webclient.users_lookupByEmail
+        lookup.return_value = {"user": member("U2", "bob", "bob@example.com")}
+
+        self.assertEqual(self.backend.username_to_userid("bob@example.com"), "U2")
+        self.assertEqual(self.backend.username_to_userid("@bob@example.com"), "U2")
+        lookup.assert_called_once_with(email="bob@example.com")
+        self.users_list.assert_not_called()
+
+
+class MissingEmailTest(UsersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.lookup = self.backend.webclient.users_lookupByEmail
+        self.lookup.side_effect = SlackApiError(
+            "users_not_found", {"ok": False, "error": "users_not_found"}
+        )
+
+    def test_miss_is_remembered(self):
+        for _ in range(2):
+            with self.assertRaises(UserDoesNotExistError):
+                self.backend.username_to_userid("nobody@example.com")
+        self.assertEqual(self.lookup.call_count, 1)
+
+    def test_miss_expires(self):
+        with self.assertRaises(UserDoesNotExistError):
+            self.backend.username_to_userid("nobody@example.com")
+        self.now += slackbolt.USERS_CACHE_MISS_REFRESH_AGE
+        with self.assertRaises(UserDoesNotExistError):
+            self.backend.username_to_userid("nobody@example.com")
+        self.assertEqual(self.lookup.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
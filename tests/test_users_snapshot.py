@@ -0,0 +1,80 @@
+import json
+import tempfile
+import unittest
+from time import time
+from unittest import mock
+
+from errbot_slack_bolt_backend import slackbolt
+from tests.helpers import make_backend, member, paginated_users
+
+
+class UsersSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        data_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(data_dir.cleanup)
+        self.data_dir = data_dir.name
+        self.now = 1000.0
+        patcher = mock.patch.object(slackbolt, "monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def save_snapshot(self, saved_at, team_id="T1"):
+        backend = make_backend(self.data_dir, team_id)
+        with backend._users_snapshot_path().open("w") as f:
+            json.dump(
+                {
+                    "saved_at": saved_at,
+                    "team_id": team_id,
+                    "users": [backend._slim_user(member("U1", "alice"))],
+                },
+                f,
+            )
+
+    def load_snapshot(self, team_id="T1"):
+        backend = make_backend(self.data_dir, team_id)
+        backend._load_users_snapshot()
+        return backend
+
+    def test_recent_snapshot_is_fresh(self):
+        self.save_snapshot(time() - 10)
+        backend = self.load_snapshot()
+        self.assertEqual(backend.username_to_userid("alice"), "U1")
+        self.assertTrue(backend._users_cache_younger_than(slackbolt.USERS_CACHE_TTL))
+        backend.webclient.users_list.assert_not_called()
+
+    def test_snapshot_from_the_future_is_stale(self):
+        self.save_snapshot(time() + 3600)
+        backend = self.load_snapshot()
+        self.assertIn("alice", backend._users_by_name)
+        self.assertFalse(backend._users_cache_younger_than(slackbolt.USERS_CACHE_TTL))
+
+
+class SharedDataDirTest(unittest.TestCase):
+    def setUp(self):
+        data_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(data_dir.cleanup)
+        first = make_backend(data_dir.name, team_id="T1")
+        first.webclient.users_list.side_effect = paginated_users(
+            [member("U1", "alice")]
+        )
+        self.assertEqual(first.username_to_userid("alice"), "U1")
+        self.data_dir = data_dir.name
+
+    def test_same_workspace_reuses_snapshot(self):
+        second = make_backend(self.data_dir, team_id="T1")
+        second._load_users_snapshot()
+        self.assertEqual(second.username_to_userid("alice"), "U1")
+        second.webclient.users_list.assert_not_called()
+
+    def test_other_workspace_ignores_snapshot(self):
+        second = make_backend(self.data_dir, team_id="T2")
+        second.webclient.users_list.side_effect = paginated_users(
+            [member("W1", "alice")]
+        )
+        second._load_users_snapshot()
+        self.assertEqual(second.username_to_userid("alice"), "W1")
+        second.webclient.users_list.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()